@@ -0,0 +1,143 @@
+# computer players and battles, worked out on a pool from snapshots of the map so the
+# game loop never waits on them, their claims are merged back between simulation steps
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from ownership import NO_OWNER, border_pairs
+from territory import FIELDS
+
+SNAPSHOT_SCALE = 4 # ai looks at the ownership raster in 4x4 pixel cells
+CANDIDATES = 48 # rects tried per move
+MIN_SIZE, MAX_SIZE = 8, 60
+
+
+def snapshot(sim, scale=SNAPSHOT_SCALE):
+    # plain, picklable copy of what the ai needs, safe to read while the game goes on
+    return {
+        "tick": sim.tick,
+        "players": sim.ownership.players,
+        "scale": sim.ownership.scale * scale,
+        "owner": sim.ownership.owner[::scale, ::scale].copy(),
+        "region": sim.ownership.region[::scale, ::scale].copy(),
+        "territories": bytes(sim.territories.data),
+    }
+
+
+def _rng(seed, tick, player):
+    # same seed, tick and player always give the same moves
+    return random.Random(seed * 1000003 + tick * 131 + player)
+
+
+def plan_move(snap, player, seed=0):
+    # picks the candidate rect that claims the most free land for this player
+    owner = snap["owner"]
+    rows, cols = owner.shape
+    scale = snap["scale"]
+    rng = _rng(seed, snap["tick"], player)
+
+    # summed area tables, so each candidate is scored with 4 lookups
+    free = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    free[1:, 1:] = (owner == NO_OWNER).cumsum(0).cumsum(1)
+    enemy = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    enemy[1:, 1:] = ((owner != NO_OWNER) & (owner != player + 1)).cumsum(0).cumsum(1)
+
+    own_cells = np.argwhere(owner == player + 1)
+    best = None
+    best_score = 0
+    for _ in range(CANDIDATES):
+        w = rng.randint(MIN_SIZE, MAX_SIZE) // scale or 1
+        h = rng.randint(MIN_SIZE, MAX_SIZE) // scale or 1
+        if len(own_cells) and rng.random() < 0.7:
+            # grow from land we already have
+            cy, cx = own_cells[rng.randrange(len(own_cells))]
+            x = min(max(cx - rng.randrange(w), 0), cols - w)
+            y = min(max(cy - rng.randrange(h), 0), rows - h)
+        else:
+            x, y = rng.randrange(cols - w + 1), rng.randrange(rows - h + 1)
+        x1, y1 = x + w, y + h
+        gained = free[y1, x1] - free[y, x1] - free[y1, x] + free[y, x]
+        lost = enemy[y1, x1] - enemy[y, x1] - enemy[y1, x] + enemy[y, x]
+        score = gained - 2 * lost
+        if score > best_score:
+            best, best_score = (x * scale, y * scale, w * scale, h * scale), score
+    return [(player, *best)] if best else []
+
+
+def plan_battles(snap, seed=0):
+    # every pair of neighbours fights once, the winner takes one of the loser's border territories
+    owner = snap["owner"]
+    region = snap["region"]
+    players = snap["players"]
+    rng = _rng(seed, snap["tick"], players)
+    data = np.frombuffer(snap["territories"], dtype=np.int32).reshape(-1, FIELDS)
+    areas = np.bincount(owner.ravel(), minlength=players + 1)
+
+    # (attacker, defender, defender's region) for every cell where two players touch
+    edges = np.unique(border_pairs(owner, region), axis=0)
+    fronts = {}
+    for attacker, defender, defender_region in edges.tolist():
+        fronts.setdefault((attacker, defender), []).append(defender_region)
+
+    claims = []
+    for pa, pb in sorted(fronts):
+        if pa > pb:
+            continue # each pair once
+        a_area, b_area = areas[pa], areas[pb]
+        if rng.random() < a_area / (a_area + b_area):
+            winner, loser = pa, pb
+        else:
+            winner, loser = pb, pa
+        captured = fronts[(winner, loser)]
+        x, y, w, h = data[rng.choice(captured), :4]
+        claims.append((winner - 1, int(x), int(y), int(w), int(h)))
+    return claims
+
+
+class AIEngine: # runs ai moves and battles on a worker pool, merges them as a Simulation system
+    def __init__(self, players, every=30, workers=None, processes=True, deterministic=True, seed=0,
+                 battles=True):
+        self.players = list(players) # which players the ai controls
+        self.every = every # ticks between ai rounds
+        self.deterministic = deterministic # merge at fixed ticks, waiting for the pool if needed
+        self.seed = seed
+        self.battles = battles
+        # processes scale with cores and keep ai work off the game loop's GIL
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.pool = executor(max_workers=workers)
+        self.pending = [] # (tick to merge at, futures)
+
+    def submit(self, snap):
+        futures = [self.pool.submit(plan_move, snap, player, self.seed) for player in self.players]
+        if self.battles:
+            futures.append(self.pool.submit(plan_battles, snap, self.seed))
+        return futures
+
+    def __call__(self, sim):
+        # called once per simulation step, after that step's commands
+        while self.pending:
+            merge_tick, futures = self.pending[0]
+            if self.deterministic:
+                if sim.tick < merge_tick:
+                    break
+            elif not all(f.done() for f in futures):
+                break
+            self.pending.pop(0)
+            # fixed order, so the merged claims don't depend on which worker finished first
+            for future in futures:
+                for owner, x, y, w, h in future.result():
+                    sim.claim(owner, x, y, w, h)
+        if sim.tick % self.every == 0:
+            if not self.deterministic and self.pending:
+                return # pool is behind, skip this round instead of queueing moves from stale snapshots
+            # a round is merged one round later, giving the pool a whole round to finish
+            self.pending.append((sim.tick + self.every, self.submit(snapshot(sim))))
+
+    def shutdown(self, wait=True):
+        # waiting lets the pool close cleanly before interpreter exit
+        for _, futures in self.pending:
+            for future in futures:
+                future.cancel()
+        self.pending = []
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,68 @@
+# how ai rounds scale with worker processes and map size
+# python bench_ai.py [rounds]
+import os
+import random
+import sys
+from time import perf_counter
+
+from ai import AIEngine, snapshot, plan_move, plan_battles
+from simulation import Simulation, WIDTH, HEIGHT
+
+PLAYERS = 4
+
+
+def filled_sim(count, seed=1):
+    rng = random.Random(seed)
+    sim = Simulation()
+    for i in range(count):
+        w, h = rng.randint(5, 60), rng.randint(5, 60)
+        sim.claim(i % PLAYERS, rng.randrange(WIDTH - w), rng.randrange(HEIGHT - h), w, h)
+    sim.step()
+    return sim
+
+
+def inline(snaps):
+    for snap in snaps:
+        for player in range(PLAYERS):
+            plan_move(snap, player)
+        plan_battles(snap)
+
+
+def pooled(engine, snaps):
+    futures = []
+    for snap in snaps:
+        futures.extend(engine.submit(snap))
+    for future in futures:
+        future.result()
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    print(f"{rounds} rounds of {PLAYERS} moves + battles, {cores} cores")
+    for count in (1000, 10000, 50000):
+        sim = filled_sim(count)
+        snaps = []
+        for i in range(rounds):
+            snap = snapshot(sim)
+            snap["tick"] = i # different rng per round
+            snaps.append(snap)
+
+        start = perf_counter()
+        inline(snaps)
+        base = perf_counter() - start
+        line = f"{count:6} territories  inline {base:6.2f}s"
+        for workers in worker_counts:
+            engine = AIEngine(range(PLAYERS), workers=workers)
+            pooled(engine, snaps[:1]) # start the worker processes outside the timing
+            start = perf_counter()
+            pooled(engine, snaps)
+            elapsed = perf_counter() - start
+            engine.shutdown()
+            line += f"  {workers}w {elapsed:6.2f}s (x{base / elapsed:.1f})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# 4 headless clients and a lockstep server over loopback, reports bandwidth and latency
+# python bench_network.py [seconds]
+import asyncio
+import random
+import sys
+import threading
+from time import perf_counter, sleep
+
+from network import LockstepServer, NetClient, apply_ticks
+from profiler import percentile
+from simulation import Simulation, WIDTH, HEIGHT
+
+PLAYERS = 4
+
+
+def run_server(server, ready, stop):
+    async def main():
+        ready.port = await server.start("127.0.0.1", 0)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        await server.close()
+    asyncio.run(main())
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    server = LockstepServer(PLAYERS)
+    ready, stop = threading.Event(), threading.Event()
+    server_thread = threading.Thread(target=run_server, args=(server, ready, stop), daemon=True)
+    server_thread.start()
+    ready.wait()
+
+    clients = [NetClient("127.0.0.1", ready.port).start() for _ in range(PLAYERS)]
+    for client in clients:
+        client.connected.wait()
+    sims = [Simulation() for _ in clients]
+    rng = random.Random(1)
+
+    start = perf_counter()
+    while perf_counter() - start < seconds:
+        # each "frame" every client maybe claims something and applies confirmed ticks
+        for client, sim in zip(clients, sims):
+            if rng.random() < 0.2:
+                w, h = rng.randint(5, 60), rng.randint(5, 60)
+                client.claim(rng.randrange(WIDTH - w), rng.randrange(HEIGHT - h), w, h)
+            apply_ticks(sim, client)
+        sleep(1 / 60)
+    elapsed = perf_counter() - start
+
+    for client in clients:
+        client.stop()
+    for client, sim in zip(clients, sims):
+        apply_ticks(sim, client)
+    stop.set()
+    server_thread.join()
+
+    # clients may stop a tick or two apart, compare the state they all reached
+    common = min(sim.tick for sim in sims)
+    print(f"{PLAYERS} clients, {elapsed:.1f}s, {common} ticks ({common / elapsed:.1f}/s), "
+          f"{len(sims[0].territories)} territories")
+    for client in clients:
+        latencies = sorted(client.latencies)
+        print(f"player {client.player}: up {client.bytes_out / elapsed:7.0f} B/s  "
+              f"down {client.bytes_in / elapsed:7.0f} B/s  "
+              f"input->tick p50 {percentile(latencies, 50) * 1000:.1f} ms  p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"server out {server.bytes_out / elapsed:.0f} B/s")
+    ticks = {sim.tick for sim in sims}
+    if len(ticks) == 1:
+        same = len({bytes(sim.territories.data) for sim in sims}) == 1
+        print("simulations identical" if same else "SIMULATIONS DIFFER")
+    else:
+        print("clients stopped on different ticks, state not compared")
+
+
+if __name__ == "__main__":
+    main()
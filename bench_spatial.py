@@ -0,0 +1,81 @@
+# compares SpatialGrid queries against a linear scan over the territory store
+# python bench_spatial.py [territory count]
+import random
+import sys
+from time import perf_counter
+
+from territory import TerritoryStore, FIELDS
+from spatial import SpatialGrid, rect_distance
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def linear_point(store, x, y):
+    data = store.data
+    hits = []
+    for i in range(0, len(data), FIELDS):
+        rx, ry, rw, rh = data[i], data[i + 1], data[i + 2], data[i + 3]
+        if rx <= x < rx + rw and ry <= y < ry + rh:
+            hits.append(i // FIELDS)
+    return hits
+
+
+def linear_rect(store, x, y, w, h):
+    data = store.data
+    hits = []
+    for i in range(0, len(data), FIELDS):
+        rx, ry, rw, rh = data[i], data[i + 1], data[i + 2], data[i + 3]
+        if rx < x + w and x < rx + rw and ry < y + h and y < ry + rh:
+            hits.append(i // FIELDS)
+    return hits
+
+
+def linear_nearest(store, x, y):
+    data = store.data
+    best = None
+    for i in range(0, len(data), FIELDS):
+        dist = rect_distance(x, y, data[i], data[i + 1], data[i + 2], data[i + 3])
+        if best is None or dist < best[1]:
+            best = (i // FIELDS, dist)
+    return best
+
+
+def timed(fn, queries):
+    start = perf_counter()
+    results = [fn(*q) for q in queries]
+    return perf_counter() - start, results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(1)
+    store = TerritoryStore()
+    for _ in range(count):
+        w, h = rng.randint(2, 40), rng.randint(2, 40)
+        store.append(rng.randrange(WIDTH - w), rng.randrange(HEIGHT - h), w, h)
+
+    start = perf_counter()
+    grid = SpatialGrid(store)
+    print(f"{count} territories, grid built in {(perf_counter() - start) * 1000:.1f} ms")
+
+    points = [(rng.randrange(WIDTH), rng.randrange(HEIGHT)) for _ in range(500)]
+    rects = [(rng.randrange(WIDTH - 60), rng.randrange(HEIGHT - 60), rng.randint(1, 60), rng.randint(1, 60))
+             for _ in range(500)]
+
+    for name, fast, slow, queries in (
+            ("point", grid.query_point, lambda x, y: linear_point(store, x, y), points),
+            ("rect", grid.query_rect, lambda *r: linear_rect(store, *r), rects),
+            ("nearest", grid.nearest, lambda x, y: linear_nearest(store, x, y), points)):
+        t_fast, r_fast = timed(fast, queries)
+        t_slow, r_slow = timed(slow, queries)
+        if name == "nearest":
+            same = all(a[1] == b[1] for a, b in zip(r_fast, r_slow))
+        else:
+            same = r_fast == r_slow
+        print(f"{name:8} grid {t_fast / len(queries) * 1e6:8.1f} us/query   "
+              f"linear {t_slow / len(queries) * 1e6:8.1f} us/query   "
+              f"x{t_slow / t_fast:6.1f}   {'ok' if same else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
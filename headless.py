@@ -0,0 +1,72 @@
+# runs the simulation without a window, as fast as the cpu allows
+# python headless.py --ticks 6000 --seed 1 --screenshot map.png
+import argparse
+import os
+import random
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no display or gpu needed
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from ai import AIEngine
+from mapfile import save_map
+from simulation import Simulation, TICK_RATE, WIDTH, HEIGHT, PLAYER_COLORS
+
+
+def random_claims(seed, players=4, every=10):
+    # stand-in for real players: each player claims a random rect every few ticks
+    rng = random.Random(seed)
+
+    def feed(sim):
+        if sim.tick % every:
+            return
+        for owner in range(players):
+            w, h = rng.randint(5, 60), rng.randint(5, 60)
+            sim.claim(owner, rng.randrange(WIDTH - w), rng.randrange(HEIGHT - h), w, h)
+    return feed
+
+
+def screenshot(sim, path):
+    pygame.display.init()
+    surface = pygame.display.set_mode((WIDTH, HEIGHT))
+    sim.ownership.draw(surface, PLAYER_COLORS, border=(128, 128, 128))
+    pygame.image.save(surface, path)
+    pygame.display.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run a mapWar match without a window")
+    parser.add_argument("--ticks", type=int, default=TICK_RATE * 60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--screenshot", help="save the final map as an image")
+    parser.add_argument("--save", help="save the final map to a map file")
+    parser.add_argument("--ai", action="store_true", help="ai plays all 4 players instead of random claims")
+    parser.add_argument("--workers", type=int, help="ai worker processes, default one per core")
+    args = parser.parse_args()
+
+    sim = Simulation()
+    engine = None
+    if args.ai:
+        engine = AIEngine(range(len(PLAYER_COLORS)), workers=args.workers, seed=args.seed)
+        sim.systems.append(engine)
+    start = perf_counter()
+    sim.run(args.ticks, None if engine else random_claims(args.seed))
+    elapsed = perf_counter() - start
+    if engine:
+        engine.shutdown()
+
+    game_seconds = args.ticks / TICK_RATE
+    print(f"{args.ticks} ticks ({game_seconds:.0f}s of game time) in {elapsed:.3f}s, "
+          f"x{game_seconds / max(elapsed, 1e-9):.0f} real time, {len(sim.territories)} territories")
+    areas = sim.ownership.areas()
+    print("area per player: " + ", ".join(f"{owner}: {area}px" for owner, area in enumerate(areas)))
+    if args.save:
+        save_map(args.save, sim.territories, WIDTH, HEIGHT)
+    if args.screenshot:
+        screenshot(sim, args.screenshot)
+
+
+if __name__ == "__main__":
+    main()
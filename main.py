@@ -17,11 +17,17 @@ if __name__ == "__main__":
     """
 
 # Example file showing a basic pygame "game loop"
+import argparse
+import os
+import sys
 import pygame
-from time import sleep
-# pygame setup
-pygame.init()
-screen = pygame.display.set_mode((1280, 720))
+from renderer import DirtyRenderer
+from simulation import Simulation, PLAYER_COLORS, WIDTH, HEIGHT
+from mouse_input import MouseInput, drag_rect
+from profiler import FrameProfiler, start_log_thread
+from mapfile import load_map, MapWriter, MapFileError
+from network import NetClient, apply_ticks
+from ai import AIEngine
 
 white = (255, 255, 255)
 black = (0, 0, 0)
@@ -29,76 +35,143 @@ green = (0, 255, 0)
 blue = (0, 0, 255)
 red = (255, 0, 0)
 
-clock = pygame.time.Clock()
-running = True
 
+def main():
+    parser = argparse.ArgumentParser(description="mapWar")
+    parser.add_argument("--map", help="map file to load on start, every new territory is appended to it "
+                                      "(loading reads the whole file and indexes every territory)")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="join a multiplayer game (server: python network.py)")
+    parser.add_argument("--ai", type=int, default=0, choices=range(len(PLAYER_COLORS)), metavar="N",
+                        help=f"computer plays players 1..N, N up to {len(PLAYER_COLORS) - 1} (offline only)")
+    parser.add_argument("--trace", help="write per-frame timings to this .csv or .json file on exit")
+    args = parser.parse_args()
+    if args.connect and args.map:
+        # a local map would only exist in this client's simulation, lockstep needs every peer identical
+        parser.error("--map can't be used with --connect")
+    if args.connect and args.ai:
+        # ai claims would only go into this client's simulation, not through the server
+        parser.error("--ai can't be used with --connect")
+
+    client = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        client = NetClient(host, int(port)).start()
+        if not client.connected.wait(10) or client.error is not None:
+            client.stop()
+            sys.exit(f"could not connect to {args.connect}: {client.error or 'no answer from the server'}")
+
+    # pygame setup
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    clock = pygame.time.Clock()
+    running = True
+    renderer = DirtyRenderer(screen, black)
+
+    sim = Simulation() # territories, spatial grid and war state, stepped at a fixed rate
+    map_writer = None
+    if args.map:
+        try:
+            if os.path.exists(args.map) and os.path.getsize(args.map):
+                store, width, height = load_map(args.map)
+                if (width, height) != (WIDTH, HEIGHT):
+                    sys.exit(f"{args.map} is a {width}x{height} map, this game is {WIDTH}x{HEIGHT}")
+                sim.load_territories(store)
+                renderer.rebuild(lambda surface: sim.ownership.draw(surface, PLAYER_COLORS, black))
+            map_writer = MapWriter(args.map, WIDTH, HEIGHT)
+        except (MapFileError, OSError) as e:
+            sys.exit(f"can't use {args.map}: {e}")
+    territories = sim.territories # saving data of rects which was drawn
+    ai_engine = None
+    if args.ai:
+        # not deterministic: merge ai rounds when they are done instead of waiting on them mid-frame
+        ai_engine = AIEngine(range(1, args.ai + 1), deterministic=False)
+        sim.systems.append(ai_engine)
+    mouse = MouseInput()
+    anchor = None # first corner after a click, the second click finishes the rect
+    profiler = FrameProfiler(trace=args.trace is not None) # F3 shows the hud
+    log_thread = start_log_thread()
+
+    def commit_rect(p1, p2, p3, p4):
+        if client is not None:
+            client.claim(p1, p2, p3, p4) # applied once the server confirms the tick
+        else:
+            sim.claim(0, p1, p2, p3, p4) # applied on the next simulation step
 
-class Rect: # saving data of rects which was drawn
-    def __init__(self, p1_, p2_, p3_, p4_):
-        self.p1 = p1_
-        self.p2 = p2_
-        self.p3 = p3_
-        self.p4 = p4_
-
-    def draw(self):
-        pygame.draw.rect(screen, white, pygame.Rect(self.p1, self.p2, self.p3, self.p4))
-
-rentList = list()
-first_click = True
-
-while running:
     pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND)
-    mx, my = pygame.mouse.get_pos()
-    # poll for events
-    # pygame.QUIT event means the user clicked X to close your window
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
+    frame_time = 0.0
+    exit_message = None
+
+    while running:
+        profiler.begin()
+        mx, my = pygame.mouse.get_pos()
+        # poll for events
+        # pygame.QUIT event means the user clicked X to close your window
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+
+            gesture = mouse.handle(event)
+            if gesture is None or gesture.button != 1:
+                continue
+            if gesture.kind == "drag":
+                # press, drag and release draws the rect in one go
+                commit_rect(*drag_rect(gesture.start, gesture.end))
+                anchor = None
+            elif anchor is None:
+                anchor = gesture.start
+            else:
+                commit_rect(*drag_rect(anchor, gesture.start))
+                anchor = None
+        if client is not None and (client.error is not None or not client.thread.is_alive()):
+            # lost the server, without confirmed ticks the game can't go on
+            exit_message = f"disconnected: {client.error or 'connection closed'}"
             running = False
+        profiler.lap("events")
+
+        # step the game logic by real elapsed time, rendering only shows the result
+        # online, the server's confirmed ticks drive the steps instead
+        added = apply_ticks(sim, client) if client is not None else sim.advance(frame_time)
+        for index in added:
+            territory = territories[index]
+            renderer.commit(territory.color, territory.rect())
+            if map_writer is not None:
+                map_writer.append(territories, index) # checkpoint, nothing is lost if the game closes
+
+        # committed rects live on renderer.background, only the preview is drawn per frame
+        preview = None
+
+        # RENDER YOUR GAME HERE
+        corner = anchor if anchor is not None else mouse.dragging(1)
+        if corner is not None:
+            preview = drag_rect(corner, (mx, my))
+        profiler.lap("update")
+
+        hud = profiler.overlay(clock)
+        renderer.draw(preview, white, [(hud, (8, 8))] if hud else ())
+        profiler.lap("draw")
+        # only push the regions that changed instead of flip()ing the whole screen
+        renderer.flip()
+        profiler.lap("flip")
+
+        frame_time = clock.tick(60) / 1000  # limits FPS to 60
+        profiler.end(clock, len(territories))
+
+    if args.trace:
+        profiler.dump(args.trace)
+    if client is not None:
+        client.stop()
+    if ai_engine is not None:
+        ai_engine.shutdown()
+    if map_writer is not None:
+        map_writer.close()
+    log_thread.stop()
+    pygame.quit()
+    if exit_message:
+        sys.exit(exit_message)
 
-    # fill the screen with a color to wipe away anything from last frame
-    screen.fill("black")
-
-    # RENDER YOUR GAME HERE
-    if first_click and pygame.mouse.get_pressed(3)[0]:
-        sleep(0.2)
-        xpos, ypos = mx, my
-        first_click = False
-
-    elif not first_click:
-        if xpos > mx and ypos > my:
-            p1, p2, p3, p4 = mx, my, (xpos - mx),  (ypos - my)
-            pygame.draw.rect(screen, white, pygame.Rect(p1, p2, p3, p4))
-
-        elif mx > xpos and ypos > my:
-            p1, p2, p3, p4 = xpos, my, (mx - xpos), (ypos - my)
-            pygame.draw.rect(screen, white, pygame.Rect(p1, p2, p3, p4))
-
-        elif mx > xpos and my > ypos:
-            p1, p2, p3, p4 = xpos, ypos, (mx - xpos), (my - ypos)
-            pygame.draw.rect(screen, white, pygame.Rect(p1, p2, p3, p4))
 
-        elif xpos > mx and my > ypos:
-            p1, p2, p3, p4 = mx, ypos, (xpos - mx), (my - ypos)
-            pygame.draw.rect(screen, white, pygame.Rect(p1, p2, p3, p4))
-
-
-        if first_click == False and pygame.mouse.get_pressed(3)[0]:
-            sleep(0.2)
-            first_click = True
-            sizeX, sizeY = mx, my
-            rent = Rect(p1, p2, p3, p4)
-            # rent = Rect(xpos, ypos, mx, my, sizeX, sizeY)
-            rentList.append(rent)
-
-    for eachRent in rentList:
-        eachRent.draw()
-
-    print(len(rentList))
-    # print(f"mx = {mx}, my = {my}")
-    # print(pygame.mouse.get_pressed(3)[0])
-    # flip() the display to put your work on screen
-    pygame.display.flip()
-
-    clock.tick(60)  # limits FPS to 60
-
-pygame.quit()
+if __name__ == "__main__":
+    main()
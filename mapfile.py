@@ -0,0 +1,83 @@
+import os
+import struct
+import sys
+
+from territory import TerritoryStore, FIELDS
+
+# header: magic, version, ints per record, map width, map height
+# then fixed-size records of little-endian int32: x, y, w, h, owner, color
+# the record count is not stored, it comes from the file size so appending never rewrites the header
+MAGIC = b"MAPW"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+RECORD_SIZE = FIELDS * 4
+
+
+class MapFileError(Exception):
+    pass
+
+
+def _header(width, height):
+    return HEADER.pack(MAGIC, VERSION, FIELDS, width, height)
+
+
+def read_header(f):
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise MapFileError("file is too short to be a map")
+    magic, version, fields, width, height = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise MapFileError("not a mapWar map file")
+    if version != VERSION or fields != FIELDS:
+        raise MapFileError(f"unsupported map version {version} with {fields} fields")
+    return width, height
+
+
+def save_map(path, store, width, height):
+    # writes a complete map, replacing the file
+    data = store.data
+    if sys.byteorder != "little":
+        data = data.tolist()
+        data = struct.pack(f"<{len(data)}i", *data)
+    with open(path, "wb") as f:
+        f.write(_header(width, height))
+        f.write(data)
+
+
+def load_map(path):
+    # returns (store, width, height), reads the whole file, one copy of the records into the store
+    with open(path, "rb") as f:
+        width, height = read_header(f)
+        size = os.fstat(f.fileno()).st_size
+        count = (size - HEADER.size) // RECORD_SIZE # a half written last record is dropped
+        store = TerritoryStore()
+        store.data.frombytes(f.read(count * RECORD_SIZE))
+    if sys.byteorder != "little":
+        store.data.byteswap()
+    return store, width, height
+
+
+class MapWriter: # checkpoints territories one record at a time as they get committed
+    def __init__(self, path, width, height):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, "rb") as f:
+                read_header(f)
+        self.file = open(path, "ab")
+        if new:
+            self.file.write(_header(width, height))
+        else:
+            # drop a record that was cut off half way, so the next one lines up
+            extra = (os.path.getsize(path) - HEADER.size) % RECORD_SIZE
+            if extra:
+                self.file.truncate(os.path.getsize(path) - extra)
+        self.file.flush()
+
+    def append(self, store, index):
+        i = index * FIELDS
+        self.file.write(struct.pack("<6i", *store.data[i:i + FIELDS]))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+import pygame
+
+# kind is "click" or "drag", start/end are the press and release positions
+Gesture = namedtuple("Gesture", ["kind", "button", "start", "end"])
+
+
+def drag_rect(start, end):
+    # x, y, w, h of the rect spanned by two corners, in any order
+    x0, y0 = start
+    x1, y1 = end
+    return min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0)
+
+
+class MouseInput: # turns MOUSEBUTTONDOWN/UP events into click and drag gestures
+    def __init__(self, debounce_ms=120, drag_threshold=4):
+        self.debounce_ms = debounce_ms
+        self.drag_threshold = drag_threshold
+        self.pressed = {} # button -> position it went down at
+        self.last_down = {} # button -> ticks of the last accepted press
+
+    def handle(self, event, now=None):
+        # feed every event from pygame.event.get(), returns a Gesture or None
+        if now is None:
+            now = pygame.time.get_ticks()
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            last = self.last_down.get(event.button)
+            if last is not None and now - last < self.debounce_ms:
+                return None # bounce, the button was pressed a moment ago
+            self.last_down[event.button] = now
+            self.pressed[event.button] = event.pos
+
+        elif event.type == pygame.MOUSEBUTTONUP:
+            start = self.pressed.pop(event.button, None)
+            if start is None:
+                return None # its press was debounced
+            dx, dy = event.pos[0] - start[0], event.pos[1] - start[1]
+            if abs(dx) <= self.drag_threshold and abs(dy) <= self.drag_threshold:
+                return Gesture("click", event.button, start, start)
+            return Gesture("drag", event.button, start, event.pos)
+
+        return None
+
+    def dragging(self, button=1):
+        # press position while the button is held down, else None
+        return self.pressed.get(button)
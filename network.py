@@ -0,0 +1,254 @@
+# lockstep multiplayer: clients send their claims for each tick, the server waits until
+# every player sent that tick and then broadcasts the merged claims, every client applies
+# the same claims on the same tick so all simulations stay identical without sending state
+#
+# python network.py --port 5555 --players 4
+import argparse
+import asyncio
+import queue
+import struct
+import threading
+from collections import deque
+from time import perf_counter
+
+from simulation import TICK_RATE
+
+# every message starts with kind, tick and the number of records after it
+MESSAGE = struct.Struct("<cIH")
+WELCOME = b"W" # server -> client, tick field holds the player id, count holds the player count
+INPUT = b"I" # client -> server, records are CLAIM
+TICK = b"T" # server -> clients, records are OWNED_CLAIM
+END = b"E" # server -> clients, the match is over, tick field holds the player that left
+CLAIM = struct.Struct("<hhhh") # x, y, w, h
+OWNED_CLAIM = struct.Struct("<Bhhhh") # owner, x, y, w, h
+RECORD_SIZE = {INPUT: CLAIM.size, TICK: OWNED_CLAIM.size} # other kinds have no body
+MAX_CLAIMS = 255 # per player per tick, the rest waits for the next tick
+
+
+class MatchEnded(Exception):
+    pass
+
+
+async def read_message(reader):
+    kind, tick, count = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+    size = RECORD_SIZE.get(kind, 0)
+    body = await reader.readexactly(count * size) if count and size else b""
+    return kind, tick, count, body
+
+
+def unpack_claims(body, count, record=CLAIM):
+    return [record.unpack_from(body, i * record.size) for i in range(count)]
+
+
+class LockstepServer: # relays inputs, broadcasts tick t once every player sent its input for t
+    def __init__(self, players=4):
+        self.players = players
+        self.writers = {} # player id -> stream writer
+        self.inputs = {} # tick -> {player id: claims body}
+        self.counts = {} # tick -> {player id: claim count}
+        self.next_tick = 0
+        self.server = None
+        self.finished = None # asyncio.Event set once the match ended, made in start()
+        self.bytes_out = 0
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.finished = asyncio.Event()
+        self.server = await asyncio.start_server(self._client, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        # hang up on the clients first so their handlers finish before the loop goes away
+        for writer in list(self.writers.values()):
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+        await asyncio.sleep(0)
+
+    async def _client(self, reader, writer):
+        free = [p for p in range(self.players) if p not in self.writers]
+        if not free or self.finished.is_set():
+            writer.close()
+            return
+        player = free[0]
+        self.writers[player] = writer
+        writer.write(MESSAGE.pack(WELCOME, player, self.players))
+        try:
+            while True:
+                kind, tick, count, body = await read_message(reader)
+                if kind == INPUT and tick >= self.next_tick:
+                    self.inputs.setdefault(tick, {})[player] = body
+                    self.counts.setdefault(tick, {})[player] = count
+                    self._broadcast_ready()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writers.pop(player, None)
+            writer.close()
+            self._left(player)
+
+    def _left(self, player):
+        for inputs in (self.inputs, self.counts):
+            for by_player in inputs.values():
+                by_player.pop(player, None)
+        if self.next_tick == 0:
+            return # nothing was played yet, the next client to connect takes the free slot
+        # a rejoining client would have missed ticks it can't get back, so the match ends here
+        if not self.finished.is_set():
+            self.finished.set()
+            for writer in self.writers.values():
+                writer.write(MESSAGE.pack(END, player, 0))
+                writer.close()
+            self.server.close()
+
+    def _broadcast_ready(self):
+        while len(self.inputs.get(self.next_tick, ())) == self.players:
+            bodies = self.inputs.pop(self.next_tick)
+            counts = self.counts.pop(self.next_tick)
+            records = []
+            for player in range(self.players):
+                for x, y, w, h in unpack_claims(bodies[player], counts[player]):
+                    records.append(OWNED_CLAIM.pack(player, x, y, w, h))
+            message = MESSAGE.pack(TICK, self.next_tick, len(records)) + b"".join(records)
+            for writer in self.writers.values():
+                writer.write(message)
+            self.bytes_out += len(message) * len(self.writers)
+            self.next_tick += 1
+
+
+class NetClient: # network i/o on its own thread, the game loop only calls claim() and poll()
+    def __init__(self, host, port, input_delay=3, tick_rate=TICK_RATE):
+        self.host = host
+        self.port = port
+        self.input_delay = input_delay # ticks an input may run ahead of the last confirmed tick
+        self.dt = 1.0 / tick_rate
+        self.player = None
+        self.players = None
+        self.connected = threading.Event()
+        self.pending = [] # claims waiting for the next input message
+        self.lock = threading.Lock()
+        self.ticks = queue.Queue() # (tick, [(owner, x, y, w, h), ...]) in tick order
+        self.sent_at = {} # tick -> perf_counter when its input was sent
+        # seconds from sending an input to receiving its tick, for the last minute of ticks
+        self.latencies = deque(maxlen=tick_rate * 60)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.confirmed = -1 # last tick received from the server
+        self.running = True
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=2)
+
+    def claim(self, x, y, w, h):
+        # thread safe, goes out with the next input message
+        if w <= 0 or h <= 0:
+            return
+        with self.lock:
+            self.pending.append((x, y, w, h))
+
+    def poll(self):
+        # confirmed ticks received since the last call, never blocks
+        ticks = []
+        while True:
+            try:
+                ticks.append(self.ticks.get_nowait())
+            except queue.Empty:
+                return ticks
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except asyncio.IncompleteReadError:
+            self.error = ConnectionError("the server closed the connection")
+        except (OSError, MatchEnded) as e:
+            self.error = e
+        self.connected.set()
+
+    async def _main(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        kind, player, players, _ = await read_message(reader)
+        self.bytes_in += MESSAGE.size
+        self.player, self.players = player, players
+        self.connected.set()
+        receiving = asyncio.ensure_future(self._receive(reader))
+        sending = asyncio.ensure_future(self._send(writer))
+        try:
+            # sending ends when stop() is called, receiving only ends when the connection does
+            done, _ = await asyncio.wait([receiving, sending], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            receiving.cancel()
+            sending.cancel()
+            writer.close()
+
+    async def _receive(self, reader):
+        while True:
+            kind, tick, count, body = await read_message(reader)
+            self.bytes_in += MESSAGE.size + len(body)
+            if kind == END:
+                raise MatchEnded(f"player {tick} left, the match is over")
+            if kind != TICK:
+                continue
+            sent = self.sent_at.pop(tick, None)
+            if sent is not None:
+                self.latencies.append(perf_counter() - sent)
+            self.confirmed = tick
+            self.ticks.put((tick, unpack_claims(body, count, OWNED_CLAIM)))
+
+    async def _send(self, writer):
+        # one input per tick, at the tick rate, but never more than input_delay ahead
+        next_tick = 0
+        next_time = perf_counter()
+        while self.running:
+            if next_tick <= self.confirmed + self.input_delay:
+                with self.lock:
+                    claims = self.pending[:MAX_CLAIMS]
+                    del self.pending[:MAX_CLAIMS]
+                message = MESSAGE.pack(INPUT, next_tick, len(claims)) + b"".join(CLAIM.pack(*c) for c in claims)
+                # stamped before writing, the tick may come back while drain() is waiting
+                self.sent_at[next_tick] = perf_counter()
+                writer.write(message)
+                await writer.drain()
+                self.bytes_out += len(message)
+                next_tick += 1
+            next_time += self.dt
+            await asyncio.sleep(max(next_time - perf_counter(), 0))
+
+
+def apply_ticks(sim, client):
+    # lockstep stepping: the simulation only moves when a confirmed tick arrived
+    added = []
+    for tick, claims in client.poll():
+        for owner, x, y, w, h in claims:
+            sim.claim(owner, x, y, w, h)
+        added.extend(sim.step())
+    return added
+
+
+async def serve(host, port, players):
+    server = LockstepServer(players)
+    port = await server.start(host, port)
+    print(f"waiting for {players} players on {host}:{port}")
+    await server.finished.wait()
+    print("a player left, match over")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mapWar lockstep server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--players", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.players))
+
+
+if __name__ == "__main__":
+    main()
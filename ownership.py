@@ -0,0 +1,95 @@
+import numpy as np
+import pygame
+
+from territory import FIELDS, OWNER
+
+NO_OWNER = 0 # cells hold owner + 1, so 0 means nobody claimed them
+NO_REGION = -1
+
+
+def border_pairs(owner, region):
+    # (owner, neighbour's owner, neighbour's region) rows for every two side by side cells
+    # of different players, each such pair appears once from both sides
+    rows = []
+    for a, b, ra, rb in ((owner[:, 1:], owner[:, :-1], region[:, 1:], region[:, :-1]),
+                         (owner[1:, :], owner[:-1, :], region[1:, :], region[:-1, :])):
+        touching = (a != b) & (a != NO_OWNER) & (b != NO_OWNER)
+        a, b = a[touching].astype(np.int32), b[touching].astype(np.int32)
+        rows.append(np.stack([a, b, rb[touching]], axis=1))
+        rows.append(np.stack([b, a, ra[touching]], axis=1))
+    return np.concatenate(rows)
+
+
+class OwnershipGrid: # raster of who owns every cell of the map, newest territory on top
+    def __init__(self, store, width, height, scale=1, players=4):
+        # scale is map pixels per cell, 1 matches the screen, 4 gives a 320x180 grid for 1280x720
+        self.store = store
+        self.scale = scale
+        self.players = players
+        self.cols = -(-width // scale)
+        self.rows = -(-height // scale)
+        self.owner = np.zeros((self.rows, self.cols), dtype=np.int8)
+        self.region = np.full((self.rows, self.cols), NO_REGION, dtype=np.int32)
+        self.count = 0
+        self.sync()
+
+    def _cells(self, x, y, w, h):
+        s = self.scale
+        x0, y0 = max(x // s, 0), max(y // s, 0)
+        x1, y1 = min(-(-(x + w) // s), self.cols), min(-(-(y + h) // s), self.rows)
+        return slice(y0, max(y1, y0)), slice(x0, max(x1, x0))
+
+    def paint(self, index):
+        i = index * FIELDS
+        data = self.store.data
+        cells = self._cells(data[i], data[i + 1], data[i + 2], data[i + 3])
+        self.owner[cells] = data[i + OWNER] + 1
+        self.region[cells] = index
+
+    def sync(self):
+        # paint whatever was appended to the store since the last call
+        while self.count < len(self.store):
+            self.paint(self.count)
+            self.count += 1
+
+    def rebuild(self):
+        self.owner.fill(NO_OWNER)
+        self.region.fill(NO_REGION)
+        self.count = 0
+        self.sync()
+
+    def areas(self):
+        # owned map pixels per player, index 0 is player 0
+        counts = np.bincount(self.owner.ravel(), minlength=self.players + 1)
+        return counts[1:self.players + 1] * (self.scale * self.scale)
+
+    def border_mask(self):
+        # True on owned cells that touch a cell of a different owner (or nobody)
+        o = self.owner
+        mask = np.zeros(o.shape, dtype=bool)
+        diff_x = o[:, 1:] != o[:, :-1]
+        diff_y = o[1:, :] != o[:-1, :]
+        mask[:, 1:] |= diff_x
+        mask[:, :-1] |= diff_x
+        mask[1:, :] |= diff_y
+        mask[:-1, :] |= diff_y
+        return mask & (o != NO_OWNER)
+
+    def adjacency(self):
+        # players x players bool matrix, True where two players share a border
+        pairs = border_pairs(self.owner, self.region)
+        matrix = np.zeros((self.players, self.players), dtype=bool)
+        matrix[pairs[:, 0] - 1, pairs[:, 1] - 1] = True
+        return matrix
+
+    def draw(self, surface, colors, background=(0, 0, 0), border=None):
+        # one surfarray blit for the whole map instead of a draw call per territory
+        palette = np.array([background] + [colors[p % len(colors)] for p in range(self.players)], dtype=np.uint8)
+        rgb = palette[self.owner]
+        if border is not None:
+            rgb[self.border_mask()] = border
+        # surfarray is indexed [x][y]
+        cells = pygame.surfarray.make_surface(rgb.transpose(1, 0, 2))
+        if self.scale != 1:
+            cells = pygame.transform.scale(cells, (self.cols * self.scale, self.rows * self.scale))
+        surface.blit(cells, (0, 0))
@@ -0,0 +1,126 @@
+import csv
+import json
+import logging
+import queue
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter
+
+import pygame
+
+PHASES = ("events", "update", "draw", "flip")
+
+log = logging.getLogger("mapwar.perf")
+
+
+def start_log_thread(stream_handler=None):
+    # log records are written by a background thread, the frame loop only puts them on a queue
+    records = queue.SimpleQueue()
+    log.addHandler(QueueHandler(records))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener = QueueListener(records, stream_handler or logging.StreamHandler())
+    listener.start()
+    return listener
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class FrameProfiler: # per-phase timings, frame time percentiles and an on-screen hud
+    def __init__(self, window=300, log_every=5.0, trace=False):
+        self.frame_times = deque(maxlen=window) # ms per frame, from pygame.time.Clock
+        self.phase_times = {name: deque(maxlen=window) for name in PHASES}
+        self.current = {}
+        self.last = 0.0
+        self.log_every = log_every # seconds between log lines, 0 turns logging off
+        self.next_log = perf_counter() + log_every
+        self.trace = [] if trace else None
+        self.frame = 0
+        self.visible = False
+        self.font = None
+        self.hud = None
+        self.hud_frame = -1
+
+    def begin(self):
+        self.current = {}
+        self.last = perf_counter()
+
+    def lap(self, phase):
+        # time since the previous lap (or begin) is charged to this phase
+        now = perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def end(self, clock, territories=0):
+        # call right after clock.tick()
+        self.frame_times.append(clock.get_time())
+        for name in PHASES:
+            self.phase_times[name].append(self.current.get(name, 0.0))
+        if self.trace is not None:
+            row = {"frame": self.frame, "frame_ms": clock.get_time(), "raw_ms": clock.get_rawtime(),
+                   "territories": territories}
+            for name in PHASES:
+                row[name + "_ms"] = round(self.current.get(name, 0.0), 4)
+            self.trace.append(row)
+        self.frame += 1
+
+        if self.log_every and self.last >= self.next_log:
+            self.next_log = self.last + self.log_every
+            stats = self.stats()
+            log.info("fps %.1f  p50 %.1fms  p95 %.1fms  p99 %.1fms  territories %d",
+                     clock.get_fps(), stats["p50"], stats["p95"], stats["p99"], territories)
+
+    def stats(self):
+        ordered = sorted(self.frame_times)
+        result = {"p50": percentile(ordered, 50), "p95": percentile(ordered, 95),
+                  "p99": percentile(ordered, 99), "max": ordered[-1] if ordered else 0}
+        for name in PHASES:
+            times = self.phase_times[name]
+            result[name] = sum(times) / len(times) if times else 0.0
+        return result
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def overlay(self, clock, every=15):
+        # hud surface for DirtyRenderer.draw(overlays=...), re-rendered every few frames
+        if not self.visible:
+            return None
+        if self.hud is None or self.frame - self.hud_frame >= every:
+            if self.font is None:
+                self.font = pygame.font.Font(None, 20)
+            stats = self.stats()
+            lines = [f"fps {clock.get_fps():5.1f}",
+                     f"frame p50 {stats['p50']:.1f}  p95 {stats['p95']:.1f}  p99 {stats['p99']:.1f} ms"]
+            lines += [f"{name:7} {stats[name]:.2f} ms" for name in PHASES]
+            rendered = [self.font.render(line, True, (255, 255, 0)) for line in lines]
+            width = max(r.get_width() for r in rendered) + 8
+            height = sum(r.get_height() for r in rendered) + 8
+            self.hud = pygame.Surface((width, height))
+            self.hud.fill((30, 30, 30))
+            y = 4
+            for r in rendered:
+                self.hud.blit(r, (4, y))
+                y += r.get_height()
+            self.hud_frame = self.frame
+        return self.hud
+
+    def dump(self, path):
+        # writes the per-frame trace, .json or anything else as csv
+        if not self.trace:
+            return
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(self.trace, f)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(self.trace[0]))
+                writer.writeheader()
+                writer.writerows(self.trace)
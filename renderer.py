@@ -0,0 +1,57 @@
+import pygame
+
+
+class DirtyRenderer: # draws only the parts of the screen that changed since last frame
+    def __init__(self, screen, bg_color=(0, 0, 0)):
+        self.screen = screen
+        self.bg_color = bg_color
+        # committed rects are drawn once onto this surface and never again
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(bg_color)
+        self.dirty = [screen.get_rect()] # first frame pushes the whole screen
+        self.last_preview = None
+        self.last_overlays = []
+        self.regions = [] # drawn but not pushed to the display yet
+
+    def commit(self, color, rect):
+        rect = pygame.Rect(rect)
+        pygame.draw.rect(self.background, color, rect)
+        self.dirty.append(rect)
+
+    def rebuild(self, draw_fn):
+        # draw_fn(surface) paints everything that is committed, used after loading a map
+        self.background.fill(self.bg_color)
+        draw_fn(self.background)
+        self.dirty.append(self.screen.get_rect())
+
+    def draw(self, preview=None, preview_color=(255, 255, 255), overlays=()):
+        # overlays are (surface, pos) pairs drawn on top, e.g. the performance hud
+        # erase last frame's preview and overlays by restoring the background under them
+        if self.last_preview is not None:
+            self.dirty.append(self.last_preview)
+        self.dirty.extend(self.last_overlays)
+        if preview is not None:
+            preview = pygame.Rect(preview)
+            self.dirty.append(preview)
+        overlay_rects = [surface.get_rect(topleft=pos) for surface, pos in overlays]
+        self.dirty.extend(overlay_rects)
+
+        screen_rect = self.screen.get_rect()
+        regions = [r.clip(screen_rect) for r in self.dirty]
+        self.regions = [r for r in regions if r.width and r.height]
+        for r in self.regions:
+            self.screen.blit(self.background, r, r)
+        if preview is not None:
+            pygame.draw.rect(self.screen, preview_color, preview)
+        for surface, pos in overlays:
+            self.screen.blit(surface, pos)
+
+        self.last_preview = preview
+        self.last_overlays = overlay_rects
+        self.dirty = []
+
+    def flip(self):
+        # push only the regions draw() touched
+        if self.regions:
+            pygame.display.update(self.regions)
+        self.regions = []
@@ -0,0 +1,67 @@
+from territory import TerritoryStore
+from spatial import SpatialGrid
+from ownership import OwnershipGrid
+
+WIDTH, HEIGHT = 1280, 720
+TICK_RATE = 60 # simulation steps per second, no matter how fast frames are drawn
+MAX_STEPS_PER_ADVANCE = 10 # after a long stall, drop time instead of trying to catch up forever
+
+PLAYER_COLORS = [(255, 255, 255), (0, 255, 0), (0, 0, 255), (255, 0, 0)]
+
+
+class Simulation: # territory and war state, advanced in fixed steps independently of rendering
+    def __init__(self, tick_rate=TICK_RATE, ownership_scale=1):
+        self.territories = TerritoryStore()
+        self.grid = SpatialGrid(self.territories)
+        # who owns each cell of the map, for areas, borders and adjacency between players
+        self.ownership = OwnershipGrid(self.territories, WIDTH, HEIGHT, ownership_scale, len(PLAYER_COLORS))
+        self.tick = 0
+        self.dt = 1.0 / tick_rate
+        self.accumulator = 0.0
+        self.commands = [] # queued input, applied at the start of the next step
+        self.systems = [] # fn(sim) run once per step after commands, e.g. battles or ai
+
+    def load_territories(self, store):
+        # swap in a loaded map, the spatial grid and ownership raster are rebuilt from it
+        self.territories = store
+        self.grid = SpatialGrid(store)
+        self.ownership = OwnershipGrid(store, WIDTH, HEIGHT, self.ownership.scale, self.ownership.players)
+
+    def claim(self, owner, x, y, w, h):
+        if w <= 0 or h <= 0:
+            return
+        self.commands.append((owner, x, y, w, h))
+
+    def step(self):
+        # one fixed step, returns the indices of territories added in it
+        commands, self.commands = self.commands, []
+        added = []
+        for owner, x, y, w, h in commands:
+            added.append(self.territories.append(x, y, w, h, owner, PLAYER_COLORS[owner % len(PLAYER_COLORS)]))
+        self.grid.sync()
+        self.ownership.sync()
+        for system in self.systems:
+            system(self)
+        self.tick += 1
+        return added
+
+    def advance(self, seconds):
+        # run as many fixed steps as fit in the elapsed real time
+        self.accumulator += seconds
+        added = []
+        steps = 0
+        while self.accumulator >= self.dt:
+            if steps == MAX_STEPS_PER_ADVANCE:
+                self.accumulator = 0.0
+                break
+            added.extend(self.step())
+            self.accumulator -= self.dt
+            steps += 1
+        return added
+
+    def run(self, ticks, feed=None):
+        # headless: step as fast as possible, feed(sim) can queue commands before each step
+        for _ in range(ticks):
+            if feed is not None:
+                feed(self)
+            self.step()
@@ -0,0 +1,108 @@
+from territory import FIELDS
+
+
+def rect_distance(x, y, rx, ry, rw, rh):
+    # distance from a point to the closest edge of a rect, 0 when the point is inside
+    dx = max(rx - x, 0, x - (rx + rw))
+    dy = max(ry - y, 0, y - (ry + rh))
+    return (dx * dx + dy * dy) ** 0.5
+
+
+class SpatialGrid: # uniform grid over territory indices, so queries don't scan every territory
+    def __init__(self, store, cell_size=64):
+        self.store = store
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = None # min/max cell coords that hold anything
+        self.count = 0
+        self.sync()
+
+    def _cell_range(self, x, y, w, h):
+        cs = self.cell_size
+        # a zero-size rect still belongs to the cell it sits in
+        return x // cs, y // cs, (x + max(w, 1) - 1) // cs, (y + max(h, 1) - 1) // cs
+
+    def _rect(self, index):
+        i = index * FIELDS
+        data = self.store.data
+        return data[i], data[i + 1], data[i + 2], data[i + 3]
+
+    def insert(self, index):
+        x0, y0, x1, y1 = self._cell_range(*self._rect(index))
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells.setdefault((cx, cy), []).append(index)
+        if self.bounds is None:
+            self.bounds = [x0, y0, x1, y1]
+        else:
+            b = self.bounds
+            b[0], b[1], b[2], b[3] = min(b[0], x0), min(b[1], y0), max(b[2], x1), max(b[3], y1)
+
+    def sync(self):
+        # index whatever was appended to the store since the last call
+        while self.count < len(self.store):
+            self.insert(self.count)
+            self.count += 1
+
+    def rebuild(self):
+        self.cells = {}
+        self.bounds = None
+        self.count = 0
+        self.sync()
+
+    def query_point(self, x, y):
+        # indices of territories containing (x, y), newest last
+        cs = self.cell_size
+        hits = []
+        for index in self.cells.get((x // cs, y // cs), ()):
+            rx, ry, rw, rh = self._rect(index)
+            if rx <= x < rx + rw and ry <= y < ry + rh:
+                hits.append(index)
+        return hits
+
+    def query_rect(self, x, y, w, h):
+        # indices of territories overlapping the rect, touching edges don't count
+        x0, y0, x1, y1 = self._cell_range(x, y, w, h)
+        seen = set()
+        hits = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for index in self.cells.get((cx, cy), ()):
+                    if index in seen:
+                        continue
+                    seen.add(index)
+                    rx, ry, rw, rh = self._rect(index)
+                    if rx < x + w and x < rx + rw and ry < y + h and y < ry + rh:
+                        hits.append(index)
+        hits.sort()
+        return hits
+
+    def nearest(self, x, y, max_distance=None):
+        # (index, distance) of the territory closest to (x, y), or None
+        if not self.cells:
+            return None
+        cs = self.cell_size
+        cx, cy = x // cs, y // cs
+        bx0, by0, bx1, by1 = self.bounds
+        max_ring = max(abs(cx - bx0), abs(cx - bx1), abs(cy - by0), abs(cy - by1))
+        best = None
+        best_dist = None
+        ring = 0
+        while ring <= max_ring:
+            # cells on this ring and further out are at least (ring - 1) * cs away from the point
+            if best is not None and best_dist < ring * cs - cs:
+                break
+            if max_distance is not None and ring * cs - cs > max_distance:
+                break
+            for ix in range(cx - ring, cx + ring + 1):
+                for iy in range(cy - ring, cy + ring + 1):
+                    if ring and abs(ix - cx) != ring and abs(iy - cy) != ring:
+                        continue # inner cells were checked on earlier rings
+                    for index in self.cells.get((ix, iy), ()):
+                        dist = rect_distance(x, y, *self._rect(index))
+                        if best is None or dist < best_dist or (dist == best_dist and index < best):
+                            best, best_dist = index, dist
+            ring += 1
+        if best is None or (max_distance is not None and best_dist > max_distance):
+            return None
+        return best, best_dist
@@ -0,0 +1,88 @@
+from array import array
+
+import pygame
+
+# one record per territory, all records packed one after another in a single array('i')
+# x, y, w, h, owner, color(0xRRGGBB)
+X, Y, W, H, OWNER, COLOR = range(6)
+FIELDS = 6
+
+
+def pack_color(color):
+    r, g, b = color[0], color[1], color[2]
+    return (r << 16) | (g << 8) | b
+
+
+def unpack_color(value):
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+class Territory: # light view into one record of the store, works like the old Rect class
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def _get(self, field):
+        return self.store.data[self.index * FIELDS + field]
+
+    @property
+    def p1(self):
+        return self._get(X)
+
+    @property
+    def p2(self):
+        return self._get(Y)
+
+    @property
+    def p3(self):
+        return self._get(W)
+
+    @property
+    def p4(self):
+        return self._get(H)
+
+    @property
+    def owner(self):
+        return self._get(OWNER)
+
+    @property
+    def color(self):
+        return unpack_color(self._get(COLOR))
+
+    def rect(self):
+        i = self.index * FIELDS
+        return tuple(self.store.data[i:i + 4])
+
+    def draw(self, surface=None):
+        # like the old Rect.draw(), draws on the screen unless told otherwise
+        if surface is None:
+            surface = pygame.display.get_surface()
+        surface.fill(self.color, self.rect())
+
+
+class TerritoryStore: # every committed territory, kept as plain ints instead of python objects
+    def __init__(self):
+        self.data = array("i")
+
+    def __len__(self):
+        return len(self.data) // FIELDS
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("territory index out of range")
+        return Territory(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Territory(self, i)
+
+    def append(self, x, y, w, h, owner=0, color=(255, 255, 255)):
+        self.data.extend((x, y, w, h, owner, pack_color(color)))
+        return len(self) - 1
+
+    def clear(self):
+        del self.data[:]